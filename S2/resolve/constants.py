@@ -0,0 +1,60 @@
+"""
+Shared constants for identity resolution.
+"""
+
+import re
+import sys
+from typing import Dict, List, Tuple
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+
+# Single cancer-term vocabulary shared by the matcher and the writer so
+# note content is scanned once against one term set. Terms are interned so
+# every reference across the pipeline shares one string object.
+CANCER_TERMS: Tuple[str, ...] = tuple(sys.intern(t) for t in (
+    "adenocarcinoma", "carcinoma", "sarcoma", "leukemia", "lymphoma",
+    "melanoma", "glioblastoma", "pancreatic", "breast", "lung", "colon",
+    "prostate", "ovarian", "cervical", "uterine", "bladder", "kidney",
+    "liver", "stomach", "esophageal", "thyroid", "brain", "bone"
+))
+
+# Term -> bit position; a note's diagnoses are carried as one int bitmask
+TERM_INDEX: Dict[str, int] = {t: i for i, t in enumerate(CANCER_TERMS)}
+
+# Single scan over the content. The alternation sits inside a lookahead
+# so matches can overlap: "adenocarcinoma" must also report "carcinoma",
+# matching the baseline per-term substring scan. Longest-first ordering
+# means the capture at any position is the longest term starting there;
+# shorter terms sharing that start are prefixes, recovered through
+# CONTAINED_MASKS below.
+CANCER_RE = re.compile(
+    "(?=(" + "|".join(map(re.escape, sorted(CANCER_TERMS, key=len, reverse=True))) + "))",
+    re.IGNORECASE
+)
+
+# Term index -> bitmask of every vocabulary term contained in that term
+# (including itself), e.g. the "adenocarcinoma" mask carries the
+# "carcinoma" bit. OR-ing these per match keeps contained terms set.
+CONTAINED_MASKS: Tuple[int, ...] = tuple(
+    sum(1 << j for j, other in enumerate(CANCER_TERMS) if other in term)
+    for term in CANCER_TERMS
+)
+
+# When pyahocorasick is installed, scan with a true Aho-Corasick automaton
+# instead; it matches all terms in one C-level pass over the content
+if ahocorasick is not None:
+    CANCER_AUTOMATON = ahocorasick.Automaton()
+    for _term in CANCER_TERMS:
+        CANCER_AUTOMATON.add_word(_term, _term)
+    CANCER_AUTOMATON.make_automaton()
+else:
+    CANCER_AUTOMATON = None
+
+
+def mask_to_terms(mask: int) -> List[str]:
+    """Expand a diagnosis bitmask back into its cancer terms."""
+    return [t for i, t in enumerate(CANCER_TERMS) if mask >> i & 1]
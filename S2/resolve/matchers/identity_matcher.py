@@ -2,11 +2,57 @@
 Identity resolution matcher for patient records.
 """
 
+import functools
 import hashlib
-import re
 from typing import Dict, List, Set, Tuple, Optional
 from dataclasses import dataclass
 
+from ..constants import CANCER_AUTOMATON, CANCER_RE, CONTAINED_MASKS, TERM_INDEX, mask_to_terms
+
+
+# Shared fallback for absent sub-dicts; avoids allocating a throwaway {}
+# default on every .get() call in the per-note path
+_EMPTY = {}
+
+# Per-source MRN prefixes stripped during normalization
+_SRC_PREFIX = {
+    "Source-A": "MDA-",
+    "Source-B": "BMC-",
+    "Source-C": "CANCER-",
+}
+
+
+# Distinct masks are few, so the sorted-joined key form is cached per mask
+_DX_KEY_CACHE: Dict[int, str] = {}
+
+
+def _mask_to_key(mask: int) -> str:
+    """Render a diagnosis bitmask as a stable sorted key string."""
+    key = _DX_KEY_CACHE.get(mask)
+    if key is None:
+        key = "|".join(sorted(mask_to_terms(mask)))
+        _DX_KEY_CACHE[mask] = key
+    return key
+
+
+def _pkey(key: str) -> int:
+    """Hash one identifier key to a 64-bit int for UID derivation."""
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), 'big')
+
+
+@functools.lru_cache(maxsize=65536)
+def _normalize_mrn(mrn: str, source_id: str) -> str:
+    """
+    Normalize an MRN string; memoized since the same MRN recurs across a
+    patient's notes.
+    """
+    mrn = mrn.strip().upper()
+
+    # Source-specific normalization: strip the known prefix, if any.
+    # A literal removeprefix is much cheaper than the regex engine here.
+    prefix = _SRC_PREFIX.get(source_id)
+    return mrn.removeprefix(prefix) if prefix else mrn
+
 
 @dataclass
 class MatchResult:
@@ -23,10 +69,16 @@ class IdentityMatcher:
     """
     
     def __init__(self):
-        self.patient_groups: Dict[str, Set[str]] = {}  # patient_uid -> set of note_uids
-        self.mrn_to_patient: Dict[str, str] = {}  # normalized_mrn -> patient_uid
-        self.triplet_to_patient: Dict[str, str] = {}  # (dob, sex, dx_key) -> patient_uid
+        # Patients are tracked by dense integer ids internally; strings are
+        # only materialized at the API boundary. This keeps the per-patient
+        # footprint to a few ints instead of dicts of str -> set[str].
+        self.patient_uids: List[str] = []  # patient_id -> patient_uid
+        self.patient_notes: List[List[int]] = []  # patient_id -> note indexes
+        self.note_uid_table: List[str] = []  # note index -> note_uid
+        self.mrn_to_patient: Dict[str, int] = {}  # normalized_mrn -> patient_id
+        self.triplet_to_patient: Dict[str, int] = {}  # (dob, sex, dx_key) -> patient_id
         self.conflicts: List[Dict] = []
+        self._dx_cache: Dict[str, int] = {}  # content -> term bitmask
     
     def normalize_mrn(self, mrn: str, source_id: str) -> str:
         """
@@ -34,101 +86,111 @@ class IdentityMatcher:
         """
         if not mrn:
             return ""
-        
-        # Remove common prefixes/suffixes and standardize format
-        mrn = str(mrn).strip().upper()
-        
-        # Source-specific normalization
-        if source_id == "Source-A":
-            # Remove "MDA-" prefix if present
-            mrn = re.sub(r'^MDA-', '', mrn)
-        elif source_id == "Source-B":
-            # Remove "BMC-" prefix if present
-            mrn = re.sub(r'^BMC-', '', mrn)
-        elif source_id == "Source-C":
-            # Remove "CANCER-" prefix if present
-            mrn = re.sub(r'^CANCER-', '', mrn)
-        
-        return mrn
+
+        return _normalize_mrn(str(mrn), source_id)
     
+    def extract_diagnosis_mask(self, content: str) -> int:
+        """
+        Extract the cancer terms found in note content as a bitmask over
+        CANCER_TERMS.
+        """
+        if not content:
+            return 0
+
+        # Follow-up notes often repeat identical content; cache scans so
+        # each distinct body is only scanned once. Keyed on the content
+        # string itself - the dict falls back to equality on hash
+        # collisions, and the strings are already retained in notes_data
+        mask = self._dx_cache.get(content)
+        if mask is not None:
+            return mask
+
+        mask = 0
+        if CANCER_AUTOMATON is not None:
+            # The automaton reports every (overlapping) occurrence;
+            # CONTAINED_MASKS is applied so this branch provably yields
+            # the same mask as the regex fallback below
+            for _, term in CANCER_AUTOMATON.iter(content.lower()):
+                mask |= CONTAINED_MASKS[TERM_INDEX[term]]
+        else:
+            # Single pass over the content; re.IGNORECASE handles case
+            # folding in C without allocating a lowercased copy of the
+            # string. The lookahead captures overlap, and CONTAINED_MASKS
+            # sets the bits of terms contained in each match, so e.g.
+            # "adenocarcinoma" reports "carcinoma" too - the same term
+            # set the baseline per-term substring scan produced.
+            for match in CANCER_RE.findall(content):
+                mask |= CONTAINED_MASKS[TERM_INDEX[match.lower()]]
+
+        self._dx_cache[content] = mask
+        return mask
+
     def extract_diagnosis_key(self, content: str) -> str:
         """
         Extract a normalized diagnosis key from note content.
         """
-        if not content:
-            return ""
-        
-        # Convert to lowercase and extract common cancer terms
-        content_lower = content.lower()
-        
-        # Look for common cancer diagnoses
-        cancer_terms = [
-            "adenocarcinoma", "carcinoma", "sarcoma", "leukemia", "lymphoma",
-            "melanoma", "glioblastoma", "pancreatic", "breast", "lung", "colon",
-            "prostate", "ovarian", "cervical", "uterine", "bladder", "kidney",
-            "liver", "stomach", "esophageal", "thyroid", "brain", "bone"
-        ]
-        
-        found_terms = []
-        for term in cancer_terms:
-            if term in content_lower:
-                found_terms.append(term)
-        
-        # Sort for consistent ordering
-        return "|".join(sorted(found_terms)) if found_terms else ""
+        return _mask_to_key(self.extract_diagnosis_mask(content))
     
     def create_triplet_key(self, note: Dict) -> str:
         """
         Create a key from DOB, sex, and diagnosis for fallback matching.
         """
-        demographics = note.get("demographics", {})
-        dob = demographics.get("dob", "")
-        sex = demographics.get("sex", "")
-        
-        # Extract diagnosis from content
-        content = note.get("content", {}).get("raw_text", "")
-        dx_key = self.extract_diagnosis_key(content)
-        
-        return f"{dob}|{sex}|{dx_key}"
+        demographics = note.get("demographics") or _EMPTY
+        content = note.get("content") or _EMPTY
+
+        # Extract diagnosis from content; stash the scanned bitmask on the
+        # note so downstream consumers (DataWriter) reuse it instead of
+        # re-scanning and re-lowercasing the content
+        dx_mask = self.extract_diagnosis_mask(content.get("raw_text", ""))
+        note["_dx_mask"] = dx_mask
+        dx_key = _mask_to_key(dx_mask)
+
+        return f"{demographics.get('dob', '')}|{demographics.get('sex', '')}|{dx_key}"
     
     def generate_patient_uid(self, keys: List[str]) -> str:
         """
         Generate a deterministic patient UID from matching keys.
         """
-        # Sort keys for consistent ordering
-        sorted_keys = sorted(keys)
-        combined = "|".join(sorted_keys)
-        
-        # Create hash for deterministic UID
-        hash_obj = hashlib.sha256(combined.encode())
-        return f"P{hash_obj.hexdigest()[:8].upper()}"
+        # XOR of per-key hashes is commutative, so the UID depends only on
+        # the set of keys - no sort, join, or concatenated string needed
+        acc = 0
+        for key in keys:
+            acc ^= _pkey(key)
+        return f"P{acc & 0xFFFFFFFF:08X}"
     
-    def match_note(self, note: Dict) -> MatchResult:
+    def match_note(self, note: Dict, note_uid: str = None, mrn: str = None,
+                   source_id: str = None) -> MatchResult:
         """
         Match a note to an existing patient or create a new patient record.
+
+        Callers that already destructured uid/mrn/source_id from the note
+        pass them in to avoid re-reading the dict.
         """
-        note_uid = note.get("uid")
-        source_id = note.get("source_id")
-        mrn = note.get("mrn", "")
-        
+        if note_uid is None:
+            note_uid = note.get("uid")
+        if mrn is None:
+            mrn = note.get("mrn", "")
+        if source_id is None:
+            source_id = note.get("source_id")
+
         # Normalize MRN
         normalized_mrn = self.normalize_mrn(mrn, source_id)
         
         # Strategy 1: MRN match
         if normalized_mrn and normalized_mrn in self.mrn_to_patient:
-            patient_uid = self.mrn_to_patient[normalized_mrn]
+            patient_id = self.mrn_to_patient[normalized_mrn]
             return MatchResult(
-                patient_uid=patient_uid,
+                patient_uid=self.patient_uids[patient_id],
                 rule="mrn_match",
                 confidence=0.9
             )
-        
+
         # Strategy 2: Triplet match (DOB + sex + diagnosis)
         triplet_key = self.create_triplet_key(note)
         if triplet_key and triplet_key in self.triplet_to_patient:
-            patient_uid = self.triplet_to_patient[triplet_key]
+            patient_id = self.triplet_to_patient[triplet_key]
             return MatchResult(
-                patient_uid=patient_uid,
+                patient_uid=self.patient_uids[patient_id],
                 rule="triplet_match",
                 confidence=0.7
             )
@@ -146,65 +208,61 @@ class IdentityMatcher:
             uid_keys.append(f"note:{note_uid}")
         
         new_patient_uid = self.generate_patient_uid(uid_keys)
-        
+
         # Register the new patient
-        self._register_patient(new_patient_uid, note, normalized_mrn, triplet_key)
-        
+        self._register_patient(new_patient_uid, note_uid, normalized_mrn, triplet_key)
+
         return MatchResult(
             patient_uid=new_patient_uid,
             rule="new_patient",
             confidence=1.0
         )
-    
-    def _register_patient(self, patient_uid: str, note: Dict, normalized_mrn: str, triplet_key: str):
+
+    def _register_patient(self, patient_uid: str, note_uid: str, normalized_mrn: str, triplet_key: str):
         """
         Register a new patient and update all mappings.
         """
-        note_uid = note.get("uid")
-        
-        # Initialize patient group if needed
-        if patient_uid not in self.patient_groups:
-            self.patient_groups[patient_uid] = set()
-        
-        # Add note to patient group
-        self.patient_groups[patient_uid].add(note_uid)
-        
-        # Register MRN mapping
+        # Allocate the next dense patient id and intern the note uid
+        patient_id = len(self.patient_uids)
+        self.patient_uids.append(patient_uid)
+        note_idx = len(self.note_uid_table)
+        self.note_uid_table.append(note_uid)
+        self.patient_notes.append([note_idx])
+
+        # Register MRN mapping; setdefault inserts and returns the winner
+        # in a single dict probe
         if normalized_mrn:
-            if normalized_mrn in self.mrn_to_patient:
+            existing_id = self.mrn_to_patient.setdefault(normalized_mrn, patient_id)
+            if existing_id != patient_id:
                 # Conflict: same MRN maps to different patients
-                existing_patient = self.mrn_to_patient[normalized_mrn]
-                if existing_patient != patient_uid:
-                    self.conflicts.append({
-                        "type": "mrn_conflict",
-                        "mrn": normalized_mrn,
-                        "patient_1": existing_patient,
-                        "patient_2": patient_uid,
-                        "note_uid": note_uid
-                    })
-            else:
-                self.mrn_to_patient[normalized_mrn] = patient_uid
-        
+                self.conflicts.append({
+                    "type": "mrn_conflict",
+                    "mrn": normalized_mrn,
+                    "patient_1": self.patient_uids[existing_id],
+                    "patient_2": patient_uid,
+                    "note_uid": note_uid
+                })
+
         # Register triplet mapping
         if triplet_key:
-            if triplet_key in self.triplet_to_patient:
+            existing_id = self.triplet_to_patient.setdefault(triplet_key, patient_id)
+            if existing_id != patient_id:
                 # Conflict: same triplet maps to different patients
-                existing_patient = self.triplet_to_patient[triplet_key]
-                if existing_patient != patient_uid:
-                    self.conflicts.append({
-                        "type": "triplet_conflict",
-                        "triplet": triplet_key,
-                        "patient_1": existing_patient,
-                        "patient_2": patient_uid,
-                        "note_uid": note_uid
-                    })
-            else:
-                self.triplet_to_patient[triplet_key] = patient_uid
-    
+                self.conflicts.append({
+                    "type": "triplet_conflict",
+                    "triplet": triplet_key,
+                    "patient_1": self.patient_uids[existing_id],
+                    "patient_2": patient_uid,
+                    "note_uid": note_uid
+                })
+
     def get_conflicts(self) -> List[Dict]:
         """Get all detected conflicts."""
         return self.conflicts
-    
+
     def get_patient_groups(self) -> Dict[str, Set[str]]:
-        """Get all patient groups."""
-        return self.patient_groups
+        """Get all patient groups, materialized as uid -> note_uid sets."""
+        return {
+            uid: {self.note_uid_table[i] for i in note_idxs}
+            for uid, note_idxs in zip(self.patient_uids, self.patient_notes)
+        }
@@ -3,14 +3,38 @@ Identity resolution rules for building patient unit-of-record.
 """
 
 import json
+import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+
+import orjson
 from typing import Dict, List, Set
 
 from ..matchers import IdentityMatcher
 from ..writers import DataWriter
 
 
+def _parse_jsonl_file(file_path: str):
+    """
+    Parse one JSONL file in full.
+
+    Returns ([(line_num, note), ...], [(line_num, error), ...]) so the
+    parse work can run in worker processes while matching stays in the
+    parent, where map updates are order-dependent.
+    """
+    notes = []
+    errors = []
+    with open(file_path, 'rb') as f:
+        lines = f.read().splitlines()
+    for line_num, line in enumerate(lines, 1):
+        try:
+            notes.append((line_num, orjson.loads(line)))
+        except orjson.JSONDecodeError as e:
+            errors.append((line_num, str(e)))
+    return notes, errors
+
+
 def build(standardized_dir: str, warehouse_root: str, artifacts_root: str) -> int:
     """
     Build patient unit-of-record from standardized notes.
@@ -30,7 +54,6 @@ def build(standardized_dir: str, warehouse_root: str, artifacts_root: str) -> in
         
         # Load standardized notes
         notes_data = {}
-        note_links = []
         rule_counts = {"mrn_match": 0, "triplet_match": 0, "new_patient": 0}
         
         standardized_path = Path(standardized_dir)
@@ -38,45 +61,70 @@ def build(standardized_dir: str, warehouse_root: str, artifacts_root: str) -> in
             print(f"Error: Standardized directory {standardized_dir} does not exist")
             return 1
         
-        # Process all JSONL files in standardized directory
-        for jsonl_file in standardized_path.glob("*.jsonl"):
-            print(f"Processing {jsonl_file}")
-            
-            with open(jsonl_file, 'r') as f:
-                for line_num, line in enumerate(f, 1):
-                    try:
-                        note = json.loads(line.strip())
-                        note_uid = note.get("uid")
-                        
-                        if not note_uid:
-                            print(f"Warning: Note without UID in {jsonl_file}:{line_num}")
-                            continue
-                        
-                        # Store note data
-                        notes_data[note_uid] = note
-                        
-                        # Match note to patient
-                        match_result = matcher.match_note(note)
-                        
-                        # Count rule usage
-                        rule = match_result.rule
-                        if rule in rule_counts:
-                            rule_counts[rule] += 1
-                        
-                        # Create note link
-                        note_link = {
-                            "note_uid": note_uid,
-                            "patient_uid": match_result.patient_uid,
-                            "rule": rule,
-                            "mrn": note.get("mrn", ""),
-                            "source_id": note.get("source_id", "")
-                        }
-                        note_links.append(note_link)
-                        
-                    except json.JSONDecodeError as e:
-                        print(f"Error parsing JSON in {jsonl_file}:{line_num}: {e}")
+        # Parse all JSONL files, fanning out across processes when there
+        # is more than one file; JSON parsing is CPU-bound and GIL-held,
+        # so worker processes give real parallelism. Matching stays serial
+        # in the parent because the MRN/triplet maps are order-dependent.
+        # os.scandir avoids the per-entry Path construction and extra stat
+        # calls that pathlib's glob pays on large directories
+        with os.scandir(standardized_dir) as it:
+            file_paths = sorted(
+                entry.path for entry in it
+                if entry.is_file(follow_symlinks=False) and entry.name.endswith(".jsonl")
+            )
+
+        if len(file_paths) > 1:
+            with ProcessPoolExecutor() as executor:
+                parsed = list(executor.map(_parse_jsonl_file, file_paths))
+        else:
+            parsed = [_parse_jsonl_file(p) for p in file_paths]
+
+        # Per-record problems are counted in the loop and summarized once
+        # per file afterwards, keeping console writes out of the hot path
+        parse_error_count = 0
+        missing_uid_count = 0
+
+        # Links are streamed straight to disk as they are produced instead
+        # of accumulating one row object per note in memory
+        with writer.open_note_links_sink() as add_link:
+            for jsonl_file, (notes, errors) in zip(file_paths, parsed):
+                print(f"Processing {jsonl_file}")
+
+                if errors:
+                    parse_error_count += len(errors)
+                    first_line, first_error = errors[0]
+                    print(f"  {len(errors)} JSON parse errors "
+                          f"(first at line {first_line}: {first_error})")
+
+                file_missing_uid = 0
+                for line_num, note in notes:
+                    # Destructure once; the matcher and the link row reuse
+                    # the same locals instead of re-reading the note dict
+                    note_uid = note.get("uid")
+                    mrn = note.get("mrn", "")
+                    source_id = note.get("source_id", "")
+
+                    if not note_uid:
+                        file_missing_uid += 1
                         continue
-        
+
+                    # Store note data
+                    notes_data[note_uid] = note
+
+                    # Match note to patient
+                    match_result = matcher.match_note(note, note_uid, mrn, source_id)
+
+                    # Count rule usage
+                    rule = match_result.rule
+                    if rule in rule_counts:
+                        rule_counts[rule] += 1
+
+                    add_link((note_uid, match_result.patient_uid, rule, mrn, source_id))
+
+                if file_missing_uid:
+                    missing_uid_count += file_missing_uid
+                    print(f"  Warning: {file_missing_uid} notes without UID skipped")
+
         # Get results
         patient_groups = matcher.get_patient_groups()
         conflicts = matcher.get_conflicts()
@@ -95,13 +143,16 @@ def build(standardized_dir: str, warehouse_root: str, artifacts_root: str) -> in
             "conflict_count": len(conflicts)
         }
         
-        # Write outputs
+        # Write outputs (note links were already streamed above)
         patients_file = writer.write_patient_records(patient_groups, notes_data)
-        links_file = writer.write_note_links(note_links)
+        links_file = str(writer.links_file)
         conflicts_file = writer.write_conflicts(conflicts)
         report_file = writer.write_report(stats, conflicts)
         
         print(f"Successfully processed {total_notes} notes into {total_patients} patients")
+        if parse_error_count or missing_uid_count:
+            print(f"Skipped {parse_error_count} unparseable lines and "
+                  f"{missing_uid_count} notes without UID")
         print(f"Output files:")
         print(f"  Patients: {patients_file}")
         print(f"  Note links: {links_file}")
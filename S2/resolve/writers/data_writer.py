@@ -2,12 +2,18 @@
 Data writer for patient records, note links, and reports.
 """
 
-import json
-import os
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Set, Any
 
+import orjson
+
+from ..constants import mask_to_terms
+
+# Field order for note-link tuples produced by resolve.rules.build
+LINK_FIELDS = ("note_uid", "patient_uid", "rule", "mrn", "source_id")
+
 
 class DataWriter:
     """
@@ -18,15 +24,32 @@ class DataWriter:
         self.warehouse_root = Path(warehouse_root)
         self.artifacts_root = Path(artifacts_root)
         self.date_str = datetime.now().strftime("%Y%m%d")
+
+        # Lay out and create all output paths up front so writer methods
+        # only serialize and write
+        self.patients_file = self.warehouse_root / "patients" / self.date_str / "patients.jsonl"
+        self.links_file = self.warehouse_root / "links" / self.date_str / "note_links.jsonl"
+        self.conflicts_file = self.warehouse_root / "conflicts" / self.date_str / "conflicts.jsonl"
+        self.report_file = self.artifacts_root / "identity" / self.date_str / "report.json"
+        for output in (self.patients_file, self.links_file, self.conflicts_file, self.report_file):
+            output.parent.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def _write_jsonl(file_path: Path, records: List[Dict]) -> None:
+        """
+        Serialize records and write them as JSONL in a single call,
+        avoiding one buffered write per record.
+        """
+        with open(file_path, 'wb') as f:
+            if records:
+                f.write(b'\n'.join(orjson.dumps(r) for r in records))
+                f.write(b'\n')
     
     def write_patient_records(self, patient_groups: Dict[str, Set[str]], notes_data: Dict[str, Dict]) -> str:
         """
         Write patient unit-of-record files to the data warehouse.
         """
-        patients_dir = self.warehouse_root / "patients" / self.date_str
-        patients_dir.mkdir(parents=True, exist_ok=True)
-        
-        patients_file = patients_dir / "patients.jsonl"
+        patients_file = self.patients_file
         patient_records = []
         
         for patient_uid, note_uids in patient_groups.items():
@@ -47,21 +70,11 @@ class DataWriter:
             first_note = patient_notes[0]
             demographics = first_note.get("demographics", {})
             
-            # Extract diagnoses from all notes
-            diagnoses = set()
+            # Aggregate diagnoses across notes by OR-ing the bitmasks the
+            # matcher already scanned out of the content during matching
+            dx_mask = 0
             for note in patient_notes:
-                content = note.get("content", {}).get("raw_text", "")
-                if content:
-                    # Simple diagnosis extraction - look for cancer terms
-                    cancer_terms = [
-                        "adenocarcinoma", "carcinoma", "sarcoma", "leukemia", "lymphoma",
-                        "melanoma", "glioblastoma", "pancreatic cancer", "breast cancer",
-                        "lung cancer", "colon cancer", "prostate cancer", "ovarian cancer"
-                    ]
-                    content_lower = content.lower()
-                    for term in cancer_terms:
-                        if term in content_lower:
-                            diagnoses.add(term)
+                dx_mask |= note.get("_dx_mask", 0)
             
             # Collect sources
             sources = set()
@@ -75,7 +88,7 @@ class DataWriter:
                 "patient_uid": patient_uid,
                 "mrn_set": list(mrn_set),
                 "demographics": demographics,
-                "diagnoses": list(diagnoses),
+                "diagnoses": mask_to_terms(dx_mask),
                 "provenance": {
                     "notes_linked": len(patient_notes),
                     "sources": list(sources)
@@ -85,51 +98,55 @@ class DataWriter:
             patient_records.append(patient_record)
         
         # Write to JSONL file
-        with open(patients_file, 'w') as f:
-            for record in patient_records:
-                f.write(json.dumps(record) + '\n')
-        
+        self._write_jsonl(patients_file, patient_records)
+
         return str(patients_file)
     
-    def write_note_links(self, note_links: List[Dict]) -> str:
+    @contextmanager
+    def open_note_links_sink(self):
+        """
+        Stream note links to disk as they are produced.
+
+        Yields a callback taking one (note_uid, patient_uid, rule, mrn,
+        source_id) tuple per call, so the build loop never has to hold the
+        full link list in memory.
+        """
+        with open(self.links_file, 'wb') as f:
+            write = f.write
+
+            def sink(link):
+                write(orjson.dumps(dict(zip(LINK_FIELDS, link))))
+                write(b'\n')
+
+            yield sink
+
+    def write_note_links(self, note_links: List[tuple]) -> str:
         """
         Write note-to-patient links to the data warehouse.
+
+        Links arrive as (note_uid, patient_uid, rule, mrn, source_id)
+        tuples and are expanded to their JSONL row shape here.
         """
-        links_dir = self.warehouse_root / "links" / self.date_str
-        links_dir.mkdir(parents=True, exist_ok=True)
-        
-        links_file = links_dir / "note_links.jsonl"
-        
-        with open(links_file, 'w') as f:
-            for link in note_links:
-                f.write(json.dumps(link) + '\n')
-        
-        return str(links_file)
+        self._write_jsonl(self.links_file, [
+            dict(zip(LINK_FIELDS, link)) for link in note_links
+        ])
+
+        return str(self.links_file)
     
     def write_conflicts(self, conflicts: List[Dict]) -> str:
         """
         Write conflicts to the data warehouse.
         """
-        conflicts_dir = self.warehouse_root / "conflicts" / self.date_str
-        conflicts_dir.mkdir(parents=True, exist_ok=True)
-        
-        conflicts_file = conflicts_dir / "conflicts.jsonl"
-        
-        with open(conflicts_file, 'w') as f:
-            for conflict in conflicts:
-                f.write(json.dumps(conflict) + '\n')
-        
-        return str(conflicts_file)
+        self._write_jsonl(self.conflicts_file, conflicts)
+
+        return str(self.conflicts_file)
     
     def write_report(self, stats: Dict[str, Any], conflicts: List[Dict]) -> str:
         """
         Write identity resolution report to artifacts.
         """
-        artifacts_dir = self.artifacts_root / "identity" / self.date_str
-        artifacts_dir.mkdir(parents=True, exist_ok=True)
-        
-        report_file = artifacts_dir / "report.json"
-        
+        report_file = self.report_file
+
         report = {
             "timestamp": datetime.now().isoformat(),
             "date": self.date_str,
@@ -145,7 +162,9 @@ class DataWriter:
             }
         }
         
-        with open(report_file, 'w') as f:
-            json.dump(report, f, indent=2)
-        
+        # orjson's indented writer is far faster than stdlib json.dump for
+        # reports carrying thousands of conflicts
+        with open(report_file, 'wb') as f:
+            f.write(orjson.dumps(report, option=orjson.OPT_INDENT_2))
+
         return str(report_file)
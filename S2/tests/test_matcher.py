@@ -0,0 +1,25 @@
+import sys
+import pathlib
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+from resolve.constants import mask_to_terms
+from resolve.matchers.identity_matcher import IdentityMatcher
+
+
+def test_extract_diagnosis_mask_reports_contained_terms():
+    """Terms contained in longer terms must still be reported.
+
+    Pins the baseline per-term substring semantics: "adenocarcinoma"
+    implies "carcinoma". Both the Aho-Corasick and regex scan paths must
+    produce this same term set.
+    """
+    matcher = IdentityMatcher()
+    mask = matcher.extract_diagnosis_mask("Pancreatic Adenocarcinoma; FOLFIRINOX planned.")
+    assert sorted(mask_to_terms(mask)) == ["adenocarcinoma", "carcinoma", "pancreatic"]
+
+
+def test_extract_diagnosis_mask_empty_content():
+    matcher = IdentityMatcher()
+    assert matcher.extract_diagnosis_mask("") == 0
+    assert matcher.extract_diagnosis_mask("No oncology findings.") == 0
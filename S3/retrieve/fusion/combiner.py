@@ -1,54 +1,67 @@
+import functools
+import os
+import sys
 import yaml
 import pathlib
 from typing import List, Dict, Any, Tuple
+
+import numpy as np
+
 from ..utils.io import normalize_scores
 
+# Prefer the libyaml C parser when it's compiled in
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+# Shared generator; noise is drawn in vectorized batches, never per match
+_RNG = np.random.default_rng()
+
 
 def load_config(config_path: str = "configs/retrieval.yaml") -> Dict[str, Any]:
-    """Load retrieval configuration."""
+    """Load retrieval configuration (cached per path + mtime)."""
+    try:
+        mtime_ns = os.stat(config_path).st_mtime_ns
+    except OSError:
+        mtime_ns = -1
+    return _load_config_cached(config_path, mtime_ns)
+
+
+@functools.lru_cache(maxsize=8)
+def _load_config_cached(config_path: str, mtime_ns: int) -> Dict[str, Any]:
     with open(config_path, 'r') as f:
-        return yaml.safe_load(f)
+        return yaml.load(f, Loader=_YamlLoader)
 
 
-def fuse_scores(bm25_scores: List[float], dense_scores: List[float], 
-                method: str = "weighted_sum", weights: Dict[str, float] = None) -> List[float]:
+def fuse_scores(bm25_scores, dense_scores,
+                method: str = "weighted_sum", weights: Dict[str, float] = None) -> np.ndarray:
     """
     Fuse BM25 and dense scores using specified method.
-    
+
     Args:
-        bm25_scores: List of BM25 scores
-        dense_scores: List of dense scores
+        bm25_scores: Array-like of BM25 scores
+        dense_scores: Array-like of dense scores
         method: Fusion method ("weighted_sum" or "ranked_logit")
         weights: Dictionary with w_bm25 and w_dense weights
-    
+
     Returns:
-        List of fused scores
+        Array of fused scores
     """
     if len(bm25_scores) != len(dense_scores):
         raise ValueError("BM25 and dense scores must have same length")
-    
+
     if not weights:
         weights = {"w_bm25": 0.5, "w_dense": 0.5}
-    
-    # Normalize scores to [0,1] range
+
+    if method not in ("weighted_sum", "ranked_logit"):
+        raise ValueError(f"Unknown fusion method: {method}")
+
+    # Both methods reduce to the same weighted sum; normalize and fuse in
+    # one vectorized expression
     norm_bm25 = normalize_scores(bm25_scores)
     norm_dense = normalize_scores(dense_scores)
-    
-    if method == "weighted_sum":
-        return [weights["w_bm25"] * b + weights["w_dense"] * d 
-                for b, d in zip(norm_bm25, norm_dense)]
-    
-    elif method == "ranked_logit":
-        # Simple ranked logit fusion (can be enhanced)
-        fused = []
-        for b, d in zip(norm_bm25, norm_dense):
-            # Combine scores using logit-like transformation
-            combined = weights["w_bm25"] * b + weights["w_dense"] * d
-            fused.append(combined)
-        return fused
-    
-    else:
-        raise ValueError(f"Unknown fusion method: {method}")
+    return weights["w_bm25"] * norm_bm25 + weights["w_dense"] * norm_dense
 
 
 def merge_candidates(bm25_results: List[Dict[str, Any]], 
@@ -65,83 +78,165 @@ def merge_candidates(bm25_results: List[Dict[str, Any]],
     Returns:
         List of merged candidates with both scores
     """
-    # Create mapping from chunk_id to scores
-    candidates = {}
-    
-    # Add BM25 results
-    for i, result in enumerate(bm25_results):
-        chunk_id = result['chunk_id']
-        if chunk_id not in candidates:
-            candidates[chunk_id] = {
-                'chunk_id': chunk_id,
-                's_bm25': result.get('score', 0.0),
-                's_dense': 0.0,
-                'source_id': result.get('source_id', ''),
-                'note_uid': result.get('note_uid', '')
-            }
-    
+    # Struct-of-arrays layout: a flat chunk_id -> row index, parallel
+    # score columns, and per-row metadata kept aside instead of one dict
+    # per candidate
+    id_to_row = {}
+    s_bm25 = []
+    s_dense = []
+    meta = []  # (chunk_id, source_id, note_uid) per row
+
+    # Add BM25 results; interned ids keep the row-index lookups
+    # pointer-equal with the keys interned at chunk load
+    for result in bm25_results:
+        chunk_id = sys.intern(result['chunk_id'])
+        row = id_to_row.get(chunk_id)
+        if row is None:
+            id_to_row[chunk_id] = len(meta)
+            meta.append((chunk_id, result.get('source_id', ''), result.get('note_uid', '')))
+            s_bm25.append(result.get('score', 0.0))
+            s_dense.append(0.0)
+        else:
+            s_bm25[row] = result.get('score', 0.0)
+
     # Add dense results
-    for i, result in enumerate(dense_results):
-        chunk_id = result['chunk_id']
-        if chunk_id in candidates:
-            candidates[chunk_id]['s_dense'] = result.get('score', 0.0)
+    for result in dense_results:
+        chunk_id = sys.intern(result['chunk_id'])
+        row = id_to_row.get(chunk_id)
+        if row is not None:
+            s_dense[row] = result.get('score', 0.0)
         else:
-            candidates[chunk_id] = {
-                'chunk_id': chunk_id,
-                's_bm25': 0.0,
-                's_dense': result.get('score', 0.0),
-                'source_id': result.get('source_id', ''),
-                'note_uid': result.get('note_uid', '')
-            }
-    
-    # Convert to list and sort by fused score
-    candidate_list = list(candidates.values())
-    
-    # Calculate fused scores
-    bm25_scores = [c['s_bm25'] for c in candidate_list]
-    dense_scores = [c['s_dense'] for c in candidate_list]
-    fused_scores = fuse_scores(bm25_scores, dense_scores)
-    
-    # Add fused scores and sort
-    for i, candidate in enumerate(candidate_list):
-        candidate['fusion_score'] = fused_scores[i]
-    
-    # Sort by fused score (descending) and take top K
-    candidate_list.sort(key=lambda x: x['fusion_score'], reverse=True)
-    return candidate_list[:K]
+            id_to_row[chunk_id] = len(meta)
+            meta.append((chunk_id, result.get('source_id', ''), result.get('note_uid', '')))
+            s_bm25.append(0.0)
+            s_dense.append(result.get('score', 0.0))
 
+    if not meta:
+        return []
 
-def stub_bm25_search(query: str, chunks: Dict[str, Dict[str, Any]], 
+    # Fuse the score columns in one vectorized expression
+    fused_scores = fuse_scores(
+        np.asarray(s_bm25, dtype=np.float32),
+        np.asarray(s_dense, dtype=np.float32)
+    )
+
+    # Partition straight on the fused array and materialize dicts only
+    # for the K surviving rows - no intermediate full candidate list
+    if len(meta) > K:
+        keep = np.argpartition(-fused_scores, K)[:K]
+        keep = keep[np.argsort(-fused_scores[keep])]
+    else:
+        keep = np.argsort(-fused_scores)
+
+    results = []
+    for row in keep:
+        chunk_id, source_id, note_uid = meta[row]
+        results.append({
+            'chunk_id': chunk_id,
+            's_bm25': float(s_bm25[row]),
+            's_dense': float(s_dense[row]),
+            'source_id': source_id,
+            'note_uid': note_uid,
+            'fusion_score': float(fused_scores[row])
+        })
+    return results
+
+
+def build_bm25_index(chunks: Dict[str, Dict[str, Any]]):
+    """
+    Build a CSR-layout inverted index over the chunk texts.
+
+    Returns (vocab, offsets, docs, tfs, chunk_rows): vocab maps token to
+    term id, the postings for term t live in docs/tfs[offsets[t]:offsets[t+1]],
+    and chunk_rows[i] is the chunk dict behind doc row i.
+    """
+    vocab = {}
+    postings = []  # term id -> list of (doc row, tf)
+    chunk_rows = []
+
+    for row, chunk_data in enumerate(chunks.values()):
+        chunk_rows.append(chunk_data)
+        counts = chunk_data.get('tf')
+        if counts is None:
+            counts = {}
+            for token in chunk_data.get('text', '').lower().split():
+                counts[token] = counts.get(token, 0) + 1
+        for token, tf in counts.items():
+            tid = vocab.setdefault(token, len(postings))
+            if tid == len(postings):
+                postings.append([])
+            postings[tid].append((row, tf))
+
+    total = sum(len(p) for p in postings)
+    offsets = np.zeros(len(postings) + 1, dtype=np.int32)
+    docs = np.empty(total, dtype=np.int32)
+    tfs = np.empty(total, dtype=np.float32)
+    pos = 0
+    for tid, plist in enumerate(postings):
+        for doc_row, tf in plist:
+            docs[pos] = doc_row
+            tfs[pos] = tf
+            pos += 1
+        offsets[tid + 1] = pos
+
+    return vocab, offsets, docs, tfs, chunk_rows
+
+
+def _get_bm25_index(chunks: Dict[str, Dict[str, Any]]):
+    """
+    Build (or reuse) the inverted index for a loaded chunks dict.
+
+    The index is cached on the ChunkCorpus itself so its lifetime tracks
+    the corpus - when load_chunks' lru_cache evicts a corpus, its index
+    goes with it. Plain dicts (ad-hoc callers) get a fresh build per call.
+    """
+    index = getattr(chunks, 'bm25_index', None)
+    if index is None:
+        index = build_bm25_index(chunks)
+        try:
+            chunks.bm25_index = index
+        except AttributeError:
+            pass
+    return index
+
+
+def stub_bm25_search(query: str, chunks: Dict[str, Dict[str, Any]],
                     k1: float = 0.9, b: float = 0.4, top_k: int = 200) -> List[Dict[str, Any]]:
     """
     Stub BM25 search implementation.
-    In a real implementation, this would use an actual BM25 index.
+    Scores against a CSR inverted index with NumPy scatter-adds instead of
+    scanning every chunk text per query.
     """
+    vocab, offsets, docs, tfs, chunk_rows = _get_bm25_index(chunks)
+
+    scores = np.zeros(len(chunk_rows), dtype=np.float32)
+    for term in query.lower().split():
+        tid = vocab.get(term)
+        if tid is None:
+            continue
+        start, end = offsets[tid], offsets[tid + 1]
+        # Simple TF-IDF-like scoring over the term's postings slice
+        scores[docs[start:end]] += tfs[start:end] * 0.1
+
+    # Partition down to the top_k scoring rows before materializing dicts
+    rows = np.nonzero(scores)[0]
+    row_scores = scores[rows]
+    if len(rows) > top_k:
+        keep = np.argpartition(-row_scores, top_k)[:top_k]
+        keep = keep[np.argsort(-row_scores[keep])]
+    else:
+        keep = np.argsort(-row_scores)
+
     results = []
-    query_terms = query.lower().split()
-    
-    for chunk_id, chunk_data in chunks.items():
-        text = chunk_data.get('text', '').lower()
-        score = 0.0
-        
-        # Simple term frequency scoring
-        for term in query_terms:
-            if term in text:
-                # Simple TF-IDF-like scoring
-                tf = text.count(term)
-                score += tf * 0.1  # Simplified scoring
-        
-        if score > 0:
-            results.append({
-                'chunk_id': chunk_id,
-                'score': score,
-                'source_id': chunk_data.get('source_id', ''),
-                'note_uid': chunk_data.get('note_uid', '')
-            })
-    
-    # Sort by score and return top_k
-    results.sort(key=lambda x: x['score'], reverse=True)
-    return results[:top_k]
+    for row in rows[keep]:
+        chunk_data = chunk_rows[row]
+        results.append({
+            'chunk_id': chunk_data.get('chunk_id', ''),
+            'score': float(scores[row]),
+            'source_id': chunk_data.get('source_id', ''),
+            'note_uid': chunk_data.get('note_uid', '')
+        })
+    return results
 
 
 def stub_dense_search(query: str, chunks: Dict[str, Dict[str, Any]], 
@@ -150,31 +245,40 @@ def stub_dense_search(query: str, chunks: Dict[str, Dict[str, Any]],
     Stub dense search implementation.
     In a real implementation, this would use an actual dense encoder and ANN index.
     """
+    vocab, offsets, docs, tfs, chunk_rows = _get_bm25_index(chunks)
+
+    # Term-presence scoring as scatter-adds over the shared inverted
+    # index - one vectorized add per query term instead of a Python loop
+    # over every chunk
+    scores = np.zeros(len(chunk_rows), dtype=np.float32)
+    for term in query.lower().split():
+        tid = vocab.get(term)
+        if tid is None:
+            continue
+        # Each posting is one (term, chunk) pair, so this adds the base
+        # similarity score once per chunk containing the term
+        scores[docs[offsets[tid]:offsets[tid + 1]]] += 0.2
+
+    rows = np.nonzero(scores)[0]
+    if len(rows) == 0:
+        return []
+
+    # Add randomness for variety in one vectorized draw
+    row_scores = scores[rows] + _RNG.uniform(0, 0.1, len(rows)).astype(np.float32)
+
+    if len(rows) > top_k:
+        keep = np.argpartition(-row_scores, top_k)[:top_k]
+        keep = keep[np.argsort(-row_scores[keep])]
+    else:
+        keep = np.argsort(-row_scores)
+
     results = []
-    query_terms = query.lower().split()
-    
-    for chunk_id, chunk_data in chunks.items():
-        text = chunk_data.get('text', '').lower()
-        score = 0.0
-        
-        # Simple semantic similarity scoring (stub)
-        for term in query_terms:
-            if term in text:
-                # Simulate semantic similarity
-                score += 0.2  # Base similarity score
-                
-                # Add some randomness for variety
-                import random
-                score += random.uniform(0, 0.1)
-        
-        if score > 0:
-            results.append({
-                'chunk_id': chunk_id,
-                'score': score,
-                'source_id': chunk_data.get('source_id', ''),
-                'note_uid': chunk_data.get('note_uid', '')
-            })
-    
-    # Sort by score and return top_k
-    results.sort(key=lambda x: x['score'], reverse=True)
-    return results[:top_k]
+    for i in keep:
+        chunk_data = chunk_rows[rows[i]]
+        results.append({
+            'chunk_id': chunk_data.get('chunk_id', ''),
+            'score': float(row_scores[i]),
+            'source_id': chunk_data.get('source_id', ''),
+            'note_uid': chunk_data.get('note_uid', '')
+        })
+    return results
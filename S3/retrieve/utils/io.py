@@ -1,44 +1,194 @@
-import json
+import collections
+import functools
+import mmap
+import os
 import pathlib
+import re
+import sys
 from typing import Dict, List, Optional, Any, Iterator
 import time
 
+import numpy as np
+import orjson
+
+
+def _stat_mtime_ns(path: str) -> int:
+    """Modification time for cache keys; -1 if the path can't be stat'd."""
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return -1
+
 
 def load_jsonl(file_path: str) -> List[Dict[str, Any]]:
     """Load data from a JSONL file."""
-    data = []
-    with open(file_path, 'r', encoding='utf-8') as f:
-        for line in f:
-            if line.strip():
-                data.append(json.loads(line))
-    return data
+    with open(file_path, 'rb') as f:
+        return [orjson.loads(line) for line in f if line.strip()]
 
 
 def save_jsonl(data: List[Dict[str, Any]], file_path: str) -> None:
-    """Save data to a JSONL file."""
-    with open(file_path, 'w', encoding='utf-8') as f:
-        for item in data:
-            f.write(json.dumps(item) + '\n')
+    """Save data to a JSONL file with one batched write."""
+    with open(file_path, 'wb') as f:
+        f.write(b''.join(
+            orjson.dumps(item, option=orjson.OPT_APPEND_NEWLINE) for item in data
+        ))
+
+
+def char_mask(token: str) -> int:
+    """
+    Encode a lowercased token as a 26-bit mask of the a-z characters it
+    contains. Character-set Jaccard over two tokens then reduces to two
+    integer ops plus popcounts instead of four set allocations.
+    """
+    mask = 0
+    for c in token:
+        if 'a' <= c <= 'z':
+            mask |= 1 << (ord(c) - 97)
+    return mask
+
+
+def _prepare_chunk(chunk: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Attach derived text fields once at load time so every stage reuses
+    them instead of re-lowercasing and re-splitting per query.
+    """
+    chunk_id = chunk.get('chunk_id')
+    if chunk_id is not None:
+        # Interned ids make the repeated dict lookups across stages
+        # compare by pointer instead of re-hashing long strings
+        chunk['chunk_id'] = sys.intern(chunk_id)
+    text_lower = chunk.get('text', '').lower()
+    tokens = text_lower.split()
+    chunk['text_lower'] = text_lower
+    chunk['tokens'] = tokens
+    chunk['token_set'] = frozenset(tokens)
+    chunk['token_masks'] = [char_mask(token) for token in tokens]
+    chunk['tf'] = collections.Counter(tokens)
+    return chunk
+
+
+class ChunkCorpus(dict):
+    """
+    chunk_id -> chunk mapping with a slot for derived structures (the
+    BM25 inverted index) cached directly on the corpus, so they are
+    evicted together with it instead of lingering in a global cache.
+    """
+
+    __slots__ = ('bm25_index',)
 
 
 def load_chunks(chunks_path: str) -> Dict[str, Dict[str, Any]]:
-    """Load chunks from JSONL and create a mapping from chunk_id to chunk data."""
-    chunks = {}
+    """
+    Load chunks from JSONL and create a mapping from chunk_id to chunk data.
+
+    Results are cached per (resolved path, mtime) so stages running in the
+    same process don't re-read and re-parse the same corpus.
+    """
+    path = str(pathlib.Path(chunks_path).resolve())
+    return _load_chunks_cached(path, _stat_mtime_ns(path))
+
+
+def _read_chunks_file(chunks_file: str, chunks: Dict[str, Dict[str, Any]]) -> None:
+    """
+    Parse one chunks.jsonl file into the chunks mapping.
+
+    The file is memory-mapped and consumed line by line, so the bytes
+    reach orjson without a read syscall per buffered line.
+    """
+    with open(chunks_file, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for line in iter(mm.readline, b''):
+                if line.strip():
+                    chunk = orjson.loads(line)
+                    chunks[chunk['chunk_id']] = _prepare_chunk(chunk)
+
+
+@functools.lru_cache(maxsize=8)
+def _load_chunks_cached(chunks_path: str, mtime_ns: int) -> Dict[str, Dict[str, Any]]:
+    chunks = ChunkCorpus()
     if pathlib.Path(chunks_path).is_file():
         # Single file
-        chunk_list = load_jsonl(chunks_path)
-        for chunk in chunk_list:
-            chunks[chunk['chunk_id']] = chunk
+        _read_chunks_file(chunks_path, chunks)
     else:
         # Directory - look for chunks.jsonl files
         chunks_dir = pathlib.Path(chunks_path)
         for chunks_file in chunks_dir.rglob("chunks.jsonl"):
-            chunk_list = load_jsonl(str(chunks_file))
-            for chunk in chunk_list:
-                chunks[chunk['chunk_id']] = chunk
+            _read_chunks_file(str(chunks_file), chunks)
     return chunks
 
 
+# Locates the chunk_id value in a raw JSONL line without a full parse
+_CHUNK_ID_RE = re.compile(rb'"chunk_id"\s*:\s*"([^"]+)"')
+
+
+class ChunksView:
+    """
+    Lazy read-only view over one or more chunks.jsonl files.
+
+    Construction scans the raw bytes once to index chunk_id ->
+    (file, byte offset, length); JSON parsing and chunk preparation
+    happen only for the ids actually requested, and parsed chunks are
+    memoized. Stages that look up K ids out of N chunks pay O(K) parse
+    cost instead of O(N).
+    """
+
+    def __init__(self, chunks_path: str):
+        self._index: Dict[str, tuple] = {}
+        self._cache: Dict[str, Dict[str, Any]] = {}
+        path = pathlib.Path(chunks_path)
+        files = [path] if path.is_file() else sorted(path.rglob("chunks.jsonl"))
+        for chunks_file in files:
+            self._scan(str(chunks_file))
+
+    def _scan(self, file_path: str) -> None:
+        offset = 0
+        with open(file_path, 'rb') as f:
+            for line in f:
+                match = _CHUNK_ID_RE.search(line)
+                if match:
+                    chunk_id = sys.intern(match.group(1).decode())
+                    self._index[chunk_id] = (file_path, offset, len(line))
+                offset += len(line)
+
+    def __contains__(self, chunk_id: str) -> bool:
+        return chunk_id in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __getitem__(self, chunk_id: str) -> Dict[str, Any]:
+        chunk = self._cache.get(chunk_id)
+        if chunk is not None:
+            return chunk
+        file_path, offset, length = self._index[chunk_id]
+        with open(file_path, 'rb') as f:
+            f.seek(offset)
+            chunk = _prepare_chunk(orjson.loads(f.read(length)))
+        self._cache[chunk_id] = chunk
+        return chunk
+
+    def get(self, chunk_id: str, default: Any = None) -> Any:
+        if chunk_id not in self._index:
+            return default
+        return self[chunk_id]
+
+
+def load_chunks_view(chunks_path: str) -> ChunksView:
+    """
+    Open a lazy ChunksView over a chunks JSONL file or directory
+    (cached per path + mtime, like load_chunks).
+    """
+    path = str(pathlib.Path(chunks_path).resolve())
+    return _load_chunks_view_cached(path, _stat_mtime_ns(path))
+
+
+@functools.lru_cache(maxsize=8)
+def _load_chunks_view_cached(chunks_path: str, mtime_ns: int) -> ChunksView:
+    return ChunksView(chunks_path)
+
+
 def get_chunk_text(chunk_id: str, chunks: Dict[str, Dict[str, Any]]) -> str:
     """Get text content for a given chunk_id."""
     if chunk_id not in chunks:
@@ -54,10 +204,16 @@ def get_chunk_source(chunk_id: str, chunks: Dict[str, Dict[str, Any]]) -> str:
 
 
 def load_note_links(links_path: Optional[str]) -> Dict[str, str]:
-    """Load note links to map chunk_id to patient_uid."""
+    """Load note links to map chunk_id to patient_uid (cached per path + mtime)."""
     if not links_path:
         return {}
-    
+
+    path = str(pathlib.Path(links_path).resolve())
+    return _load_note_links_cached(path, _stat_mtime_ns(path))
+
+
+@functools.lru_cache(maxsize=8)
+def _load_note_links_cached(links_path: str, mtime_ns: int) -> Dict[str, str]:
     links = {}
     try:
         links_data = load_jsonl(links_path)
@@ -65,33 +221,44 @@ def load_note_links(links_path: Optional[str]) -> Dict[str, str]:
             chunk_id = link.get('chunk_id')
             patient_uid = link.get('patient_uid')
             if chunk_id and patient_uid:
-                links[chunk_id] = patient_uid
+                links[sys.intern(chunk_id)] = patient_uid
     except Exception:
         # If links file doesn't exist or is malformed, return empty dict
         pass
     return links
 
 
-def normalize_scores(scores: List[float]) -> List[float]:
+def normalize_scores(scores) -> np.ndarray:
     """Normalize scores to [0,1] range using min-max normalization."""
-    if not scores:
-        return []
-    
-    min_score = min(scores)
-    max_score = max(scores)
-    
+    arr = np.asarray(scores, dtype=np.float32)
+    if arr.size == 0:
+        return arr
+
+    min_score = arr.min()
+    max_score = arr.max()
+
     if max_score == min_score:
-        return [0.5] * len(scores)  # All same score -> 0.5
-    
-    return [(score - min_score) / (max_score - min_score) for score in scores]
+        return np.full_like(arr, 0.5)  # All same score -> 0.5
+
+    return (arr - min_score) / (max_score - min_score)
 
 
 def timer(func):
-    """Decorator to measure function execution time."""
+    """
+    Decorator that records function execution time.
+
+    Timings are appended as (name, seconds) to ``timer.records`` instead
+    of being measured and silently discarded.
+    """
+    @functools.wraps(func)
     def wrapper(*args, **kwargs):
         start_time = time.perf_counter()
         result = func(*args, **kwargs)
-        end_time = time.perf_counter()
+        timer.records.append((func.__name__, time.perf_counter() - start_time))
         return result
     return wrapper
 
+
+# Bounded so long-running processes don't accumulate timings forever
+timer.records = collections.deque(maxlen=256)
+
@@ -1,51 +1,64 @@
 import sys
+import heapq
 import json
 import pathlib
 import argparse
+from operator import itemgetter
 from typing import Dict, List, Any
 import time
-import random
+
+import numpy as np
 
 # Add parent directory to path for imports
 sys.path.append(str(pathlib.Path(__file__).parent.parent))
 
-from retrieve.utils.io import load_jsonl, save_jsonl, load_chunks, timer
+# Shared generator; noise is drawn in vectorized batches, never per token
+_RNG = np.random.default_rng()
+
+from retrieve.utils.io import load_jsonl, save_jsonl, load_chunks_view, timer
 from retrieve.fusion.combiner import load_config
 
 
-def stub_late_interaction_scoring(query: str, chunk_text: str, 
+def stub_late_interaction_scoring(query: str, chunk: Dict[str, Any],
                                  max_len: int = 512) -> Dict[str, Any]:
     """
     Stub late interaction scoring implementation.
     In a real implementation, this would use ColBERT or similar model.
-    
+
     Args:
         query: Search query
-        chunk_text: Text content of the chunk
+        chunk: Chunk dict (tokens are precomputed at load time)
         max_len: Maximum sequence length
-    
+
     Returns:
         Dictionary with score and optional evidence
     """
     query_terms = query.lower().split()
-    chunk_words = chunk_text.lower().split()
-    
+    chunk_words = chunk.get('tokens')
+    if chunk_words is None:
+        chunk_words = chunk.get('text', '').lower().split()
+
+    # Pre-sample all noise and evidence gates for this chunk in two
+    # vectorized draws rather than two random calls per token interaction
+    noise = _RNG.uniform(0, 0.2, len(chunk_words)) if chunk_words else None
+    gates = _RNG.random(len(chunk_words)) if chunk_words else None
+
     # Simple late interaction scoring (stub)
     score = 0.0
     evidence = []
-    
+
     for i, term in enumerate(query_terms):
         term_score = 0.0
         term_evidence = []
-        
+
         for j, word in enumerate(chunk_words):
             if term in word or word in term:
                 # Simulate token-level interaction
-                interaction_score = 0.3 + random.uniform(0, 0.2)
+                interaction_score = 0.3 + float(noise[j])
                 term_score += interaction_score
-                
+
                 # Add evidence (optional)
-                if random.random() < 0.3:  # 30% chance to add evidence
+                if gates[j] < 0.3:  # 30% chance to add evidence
                     term_evidence.append({
                         "token": word,
                         "weight": interaction_score,
@@ -97,33 +110,29 @@ def run_stage_b(candidates_path: str, chunks_path: str, out_dir: str) -> Dict[st
     # Load candidates from Stage A
     candidates = load_jsonl(candidates_path)
     
-    # Load chunks for text lookup
-    chunks = load_chunks(chunks_path)
+    # Lazy chunk lookup - only the <= K_B candidate chunks get parsed
+    chunks = load_chunks_view(chunks_path)
     
     # Rescore candidates using late interaction
-    rescored = []
     max_len = li_config.get('max_len', 512)
-    
+    query = "progression after FOLFIRINOX"  # Use a default query for scoring
+
+    rescored = []
     for candidate in candidates[:K_B]:  # Process top K_B candidates
-        chunk_id = candidate['chunk_id']
-        
-        # Get chunk text
-        try:
-            chunk_text = chunks[chunk_id].get('text', '')
-        except KeyError:
+        # Get chunk data
+        chunk_data = chunks.get(candidate['chunk_id'])
+        if chunk_data is None:
             # Skip if chunk not found
             continue
-        
+
         # Apply late interaction scoring
         li_result = stub_late_interaction_scoring(
-            query="progression after FOLFIRINOX",  # Use a default query for scoring
-            chunk_text=chunk_text,
-            max_len=max_len
+            query=query, chunk=chunk_data, max_len=max_len
         )
-        
+
         # Combine with original candidate data
         rescored_candidate = {
-            'chunk_id': chunk_id,
+            'chunk_id': candidate['chunk_id'],
             's_li': li_result['s_li'],
             'fusion_score': candidate.get('fusion_score', 0.0),
             's_bm25': candidate.get('s_bm25', 0.0),
@@ -131,18 +140,16 @@ def run_stage_b(candidates_path: str, chunks_path: str, out_dir: str) -> Dict[st
             'source_id': candidate.get('source_id', ''),
             'note_uid': candidate.get('note_uid', '')
         }
-        
+
         # Add evidence if available
         if 'evidence' in li_result:
             rescored_candidate['evidence'] = li_result['evidence']
-        
+
         rescored.append(rescored_candidate)
     
-    # Sort by late interaction score (descending)
-    rescored.sort(key=lambda x: x['s_li'], reverse=True)
-    
-    # Take top K_B
-    rescored = rescored[:K_B]
+    # Keep the top K_B by late interaction score (descending); nlargest
+    # is O(N log K) instead of a full sort
+    rescored = heapq.nlargest(K_B, rescored, key=itemgetter('s_li'))
     
     # Create output directory
     out_path = pathlib.Path(out_dir)
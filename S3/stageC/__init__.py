@@ -1,7 +1,9 @@
 import sys
+import heapq
 import json
 import pathlib
 import argparse
+from operator import itemgetter
 from typing import Dict, List, Any, Optional
 import time
 import random
@@ -9,42 +11,60 @@ import random
 # Add parent directory to path for imports
 sys.path.append(str(pathlib.Path(__file__).parent.parent))
 
-from retrieve.utils.io import load_jsonl, save_jsonl, load_chunks, load_note_links, timer
+from retrieve.utils.io import (load_jsonl, save_jsonl, load_chunks_view, load_note_links,
+                               normalize_scores, timer, char_mask)
 from retrieve.fusion.combiner import load_config
 
 
-def stub_cross_encoder_scoring(query: str, chunk_text: str) -> float:
+def stub_cross_encoder_scoring(query: str, chunk: Dict[str, Any]) -> float:
     """
     Stub cross-encoder scoring implementation.
     In a real implementation, this would use a cross-encoder model.
-    
+
     Args:
         query: Search query
-        chunk_text: Text content of the chunk
-    
+        chunk: Chunk dict (lowercased text and tokens are precomputed at load time)
+
     Returns:
         Cross-encoder score
     """
     query_terms = query.lower().split()
-    chunk_words = chunk_text.lower().split()
-    
+    chunk_text = chunk.get('text_lower')
+    if chunk_text is None:
+        chunk_text = chunk.get('text', '').lower()
+    chunk_words = chunk.get('tokens')
+    if chunk_words is None:
+        chunk_words = chunk_text.split()
+    token_masks = chunk.get('token_masks')
+    if token_masks is None:
+        token_masks = [char_mask(word) for word in chunk_words]
+    token_set = chunk.get('token_set')
+    if token_set is None:
+        token_set = frozenset(chunk_words)
+
     # Simple cross-encoder scoring (stub)
     score = 0.0
-    
-    # Exact term matches
+
+    # Exact term matches as O(1) token-set lookups
     for term in query_terms:
-        if term in chunk_text.lower():
+        if term in token_set:
             score += 0.4
-    
-    # Semantic similarity (simulated)
+
+    # Semantic similarity (simulated) via character-set Jaccard; the
+    # per-token bitmasks turn each comparison into two integer ops and
+    # two popcounts instead of four set allocations
     semantic_score = 0.0
     for term in query_terms:
-        for word in chunk_words:
-            if len(term) > 2 and len(word) > 2:
-                # Simple character overlap
-                overlap = len(set(term) & set(word)) / len(set(term) | set(word))
-                semantic_score += overlap * 0.1
-    
+        if len(term) <= 2:
+            continue
+        term_mask = char_mask(term)
+        for word, word_mask in zip(chunk_words, token_masks):
+            if len(word) > 2:
+                union = (term_mask | word_mask).bit_count()
+                if union:
+                    overlap = (term_mask & word_mask).bit_count() / union
+                    semantic_score += overlap * 0.1
+
     score += semantic_score
     
     # Add some randomness for variety
@@ -54,40 +74,35 @@ def stub_cross_encoder_scoring(query: str, chunk_text: str) -> float:
     return min(score, 1.0)
 
 
+# Calibration dispatch; isotonic and Platt are stubbed with the shared
+# vectorized min-max normalization (real implementations would fit
+# sklearn models, which this tree does not depend on)
+_CALIBRATORS = {
+    "minmax": normalize_scores,
+    "isotonic": normalize_scores,
+    "platt": normalize_scores,
+}
+
+
 def calibrate_scores(scores: List[float], method: str = "isotonic") -> List[float]:
     """
     Calibrate scores using specified method.
-    
+
     Args:
         scores: List of raw scores
         method: Calibration method ("isotonic", "platt", or "minmax")
-    
+
     Returns:
         List of calibrated scores
     """
+    calibrate = _CALIBRATORS.get(method)
+    if calibrate is None:
+        raise ValueError(f"Unknown calibration method: {method}")
+
     if not scores:
         return []
-    
-    if method == "minmax":
-        # Simple min-max normalization
-        min_score = min(scores)
-        max_score = max(scores)
-        if max_score == min_score:
-            return [0.5] * len(scores)
-        return [(score - min_score) / (max_score - min_score) for score in scores]
-    
-    elif method == "isotonic":
-        # Stub isotonic regression (in real implementation, use sklearn.isotonic)
-        # For now, use min-max as approximation
-        return calibrate_scores(scores, "minmax")
-    
-    elif method == "platt":
-        # Stub Platt scaling (in real implementation, use logistic regression)
-        # For now, use min-max as approximation
-        return calibrate_scores(scores, "minmax")
-    
-    else:
-        raise ValueError(f"Unknown calibration method: {method}")
+
+    return calibrate(scores).tolist()
 
 
 @timer
@@ -115,34 +130,30 @@ def run_stage_c(rescored_path: str, chunks_path: str, out_dir: str,
     # Load rescored candidates from Stage B
     rescored = load_jsonl(rescored_path)
     
-    # Load chunks for text lookup
-    chunks = load_chunks(chunks_path)
+    # Lazy chunk lookup - only the <= K_C candidate chunks get parsed
+    chunks = load_chunks_view(chunks_path)
     
     # Load note links if provided
     note_links = load_note_links(links_path)
     
     # Apply cross-encoder scoring
     final_results = []
-    
+
     for candidate in rescored[:K_C]:  # Process top K_C candidates
         chunk_id = candidate['chunk_id']
-        
-        # Get chunk text
-        try:
-            chunk_text = chunks[chunk_id].get('text', '')
-        except KeyError:
+
+        # Get chunk data
+        chunk_data = chunks.get(chunk_id)
+        if chunk_data is None:
             # Skip if chunk not found
             continue
-        
+
         # Apply cross-encoder scoring
         xenc_score = stub_cross_encoder_scoring(
             query="",  # Query not needed for this stage
-            chunk_text=chunk_text
+            chunk=chunk_data
         )
-        
-        # Get chunk metadata
-        chunk_data = chunks[chunk_id]
-        
+
         # Create final result
         final_result = {
             'chunk_id': chunk_id,
@@ -171,11 +182,9 @@ def run_stage_c(rescored_path: str, chunks_path: str, out_dir: str,
     for i, result in enumerate(final_results):
         result['calibrated_score'] = calibrated_scores[i]
     
-    # Sort by calibrated score (descending)
-    final_results.sort(key=lambda x: x['calibrated_score'], reverse=True)
-    
-    # Take top K_C
-    final_results = final_results[:K_C]
+    # Keep the top K_C by calibrated score (descending); nlargest is
+    # O(N log K) instead of a full sort
+    final_results = heapq.nlargest(K_C, final_results, key=itemgetter('calibrated_score'))
     
     # Create output directory
     out_path = pathlib.Path(out_dir)